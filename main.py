@@ -1,38 +1,295 @@
 import asyncio
-import json
 import os
-from typing import Any, Dict, List, Optional
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from itertools import batched, filterfalse, islice
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import httpx
+import orjson
+import simdjson
+from cachetools import TTLCache
 from mcp.server.fastmcp import FastMCP
-from pyzotero import zotero
 
-# Zotero配置 - 可以通过环境变量或工具设置
+# Zotero配置 - 可以通过环境变量或工具设置（环境变量仅作为启动时的初始配置）
 ZOTERO_LIBRARY_ID = os.getenv("ZOTERO_LIBRARY_ID", "")
 ZOTERO_API_KEY = os.getenv("ZOTERO_API_KEY", "")
 ZOTERO_LIBRARY_TYPE = os.getenv("ZOTERO_LIBRARY_TYPE", "user")  # 或 'group'
 
+# Zotero Web API 地址
+ZOTERO_API_BASE = "https://api.zotero.org"
+# 分页大小（Zotero API 单次最多返回100条）
+PAGE_SIZE = 100
+# 按条目键查询或删除时单次最多50个键
+MAX_KEYS_PER_REQUEST = 50
+# Zotero条目键：8个字符，取自去掉易混淆字符后的字母表
+ITEM_KEY_PATTERN = re.compile(r"[23456789ABCDEFGHIJKLMNPQRSTUVWXYZ]{8}")
+# 服务器端快速搜索模式：匹配标题、作者和年份
+SEARCH_QMODE = "titleCreatorYear"
+# 并发请求上限，避免触发Zotero的频率限制
+MAX_CONCURRENT_REQUESTS = 8
+# 收到429（请求过多）时的最大重试次数
+MAX_RETRIES = 3
+# 响应缓存的容量及有效期（秒）
+CACHE_MAXSIZE = 32
+CACHE_TTL = 60
+
+# 所有请求共用的HTTP客户端：复用连接，并通过HTTP/2在同一连接上并发多个请求
+# 会话结束时不关闭（SSE等传输方式每个会话都会运行一次lifespan），只在服务器退出时由 serve() 释放
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60),
+    timeout=30.0,
+)
+
 # 创建FastMCP应用实例
 app = FastMCP("zotero-controller")
 
-# 全局Zotero客户端变量
-zot = None
+@dataclass(frozen=True, slots=True)
+class ZoteroConfig:
+    """Zotero连接配置，创建后不可修改，重新配置时整体替换"""
+    library_id: str
+    api_key: str
+    library_type: str
+    masked_key: str
+    base_url: str
+    headers: Dict[str, str]
+    client: httpx.AsyncClient
 
-def get_zotero_client():
-    """获取Zotero客户端，如果未配置则返回None"""
-    global zot
-    if not ZOTERO_LIBRARY_ID or not ZOTERO_API_KEY:
-        return None
-    if zot is None:
-        try:
-            zot = zotero.Zotero(ZOTERO_LIBRARY_ID, ZOTERO_LIBRARY_TYPE, ZOTERO_API_KEY)
-        except Exception as e:
-            return None
-    return zot
+    @classmethod
+    def create(cls, library_id: str, api_key: str, library_type: str, client: httpx.AsyncClient) -> "ZoteroConfig":
+        """根据凭据构造配置，预先计算库地址、认证请求头和隐藏部分内容的API密钥"""
+        masked_key = api_key[:8] + "*" * (len(api_key) - 8) if len(api_key) > 8 else "*" * len(api_key)
+        return cls(
+            library_id=library_id,
+            api_key=api_key,
+            library_type=library_type,
+            masked_key=masked_key,
+            base_url=f"{ZOTERO_API_BASE}/{library_type}s/{library_id}",
+            headers={"Zotero-API-Key": api_key, "Zotero-API-Version": "3"},
+            client=client,
+        )
+
+    def url(self, path: str) -> str:
+        """拼接当前库的API地址"""
+        return self.base_url + path
+
+class AppState:
+    """运行时状态，配置只通过整体替换 config 属性来更新"""
+
+    def __init__(self) -> None:
+        self.config: Optional[ZoteroConfig] = None
+        # 串行化配置更新；读取配置只是一次属性读取，不需要加锁
+        self.config_lock = asyncio.Lock()
+        # 服务器通过 Backoff 头要求暂缓请求时，记录可以恢复发送的时间点
+        self.backoff_until = 0.0
+
+state = AppState()
+if ZOTERO_LIBRARY_ID and ZOTERO_API_KEY:
+    state.config = ZoteroConfig.create(ZOTERO_LIBRARY_ID, ZOTERO_API_KEY, ZOTERO_LIBRARY_TYPE, http_client)
+
+class ItemSummary(NamedTuple):
+    """条目摘要，只保留工具用到的字段"""
+    key: str
+    title: Optional[str]  # 条目没有标题字段时为None
+    item_type: str
+    date_added: Optional[str]
+
+def summarize(items: List[ItemSummary]) -> List[Dict[str, Any]]:
+    """将条目摘要转换为工具输出的字典列表"""
+    return [
+        {"key": key, "title": "无标题" if title is None else title, "itemType": item_type, "dateAdded": date_added}
+        for key, title, item_type, date_added in items
+    ]
+
+def match_item_type(wanted: str) -> Callable[[ItemSummary], bool]:
+    """条目类型等于指定类型"""
+    return lambda item: item.item_type == wanted
+
+def match_title_contains(text: str) -> Callable[[ItemSummary], bool]:
+    """标题包含指定文本（不区分大小写）"""
+    needle = text.lower()
+    return lambda item: needle in (item.title or "").lower()
+
+# 筛选条件 -> 谓词构造函数，按开销从低到高排列（等值比较在前，子串匹配在后）
+CRITERIA_PREDICATES = {
+    "item_type": match_item_type,
+    "title_contains": match_title_contains,
+    # 可以添加更多条件...
+}
+
+def compile_criteria(criteria: Dict[str, Any]) -> Callable[[ItemSummary], bool]:
+    """将筛选条件编译为单个谓词，按开销从低到高的顺序逐个检查，任一条件不满足即返回"""
+    predicates = [build(criteria[name]) for name, build in CRITERIA_PREDICATES.items() if name in criteria]
+    
+    def matches(item: ItemSummary) -> bool:
+        for predicate in predicates:
+            if not predicate(item):
+                return False
+        return True
+    
+    return matches
+
+# 条目查询缓存：键为(库类型, 库ID, 查询参数, 是否全部分页)，值为(库版本号, 条目列表)
+response_cache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+
+# 复用同一个simdjson解析器，避免每次解析都重新分配缓冲区
+json_parser = simdjson.Parser()
+
+def get_zotero_config() -> Optional[ZoteroConfig]:
+    """获取当前Zotero配置，如果未配置则返回None"""
+    return state.config
+
+def dumps(obj: Any, indent: bool = True) -> str:
+    """序列化为JSON字符串，orjson直接输出UTF-8，不转义非ASCII字符"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None).decode()
+
+def parse_json(body: bytes) -> Any:
+    """将JSON响应完整解析为Python对象"""
+    return json_parser.parse(body, True)
+
+def parse_items(body: bytes) -> List[ItemSummary]:
+    """按需解析条目列表，只把摘要字段转换为Python对象"""
+    items = []
+    for item in json_parser.parse(body):
+        data = item["data"]
+        items.append(ItemSummary(
+            item["key"],
+            data.get("title"),
+            data["itemType"],
+            data.get("dateAdded"),
+        ))
+    return items
+
+async def send(config: ZoteroConfig, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """发送请求并遵守Zotero的限流要求：Backoff 头暂缓后续所有请求，429 时按 Retry-After 等待后重试"""
+    attempt = 0
+    while True:
+        delay = state.backoff_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        resp = await config.client.request(method, url, **kwargs)
+        if "Backoff" in resp.headers:
+            state.backoff_until = max(state.backoff_until, time.monotonic() + float(resp.headers["Backoff"]))
+        if resp.status_code != 429 or attempt == MAX_RETRIES:
+            return resp
+        attempt += 1
+        await asyncio.sleep(float(resp.headers.get("Retry-After", 2 ** attempt)))
+
+async def api_get(
+    config: ZoteroConfig,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.Response:
+    """发送GET请求，失败时抛出异常（304 Not Modified 原样返回）"""
+    resp = await send(config, "GET", config.url(path), params=params, headers={**config.headers, **(headers or {})})
+    if resp.status_code != 304:
+        resp.raise_for_status()
+    return resp
+
+async def fetch_remaining_pages(config: ZoteroConfig, path: str, params: Dict[str, Any], total: int) -> List[ItemSummary]:
+    """在已取得第一页的情况下，并发请求其余各页"""
+    params = {**params, "limit": PAGE_SIZE}
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def fetch_page(start: int) -> List[ItemSummary]:
+        async with semaphore:
+            resp = await api_get(config, path, {**params, "start": start})
+        return parse_items(resp.content)
+
+    pages = await asyncio.gather(*(fetch_page(start) for start in range(PAGE_SIZE, total, PAGE_SIZE)))
+    return [item for page in pages for item in page]
+
+async def cached_top(
+    config: ZoteroConfig,
+    params: Optional[Dict[str, Any]] = None,
+    all_pages: bool = False,
+) -> List[ItemSummary]:
+    """获取顶层条目并按库版本号缓存，库未修改时服务器返回304，直接复用缓存结果"""
+    params = params or {}
+    cache_key = (config.library_type, config.library_id, tuple(sorted(params.items())), all_pages)
+    cached = response_cache.get(cache_key)
+    headers = {"If-Modified-Since-Version": str(cached[0])} if cached else None
+    first_params = {**params, "limit": PAGE_SIZE, "start": 0} if all_pages else params
+    resp = await api_get(config, "/items/top", first_params, headers)
+    if resp.status_code == 304:
+        return cached[1]
+    
+    items = parse_items(resp.content)
+    if all_pages:
+        total = int(resp.headers.get("Total-Results", len(items)))
+        items.extend(await fetch_remaining_pages(config, "/items/top", params, total))
+    response_cache[cache_key] = (library_version(resp), items)
+    return items
+
+async def iter_top(config: ZoteroConfig, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[ItemSummary]:
+    """逐页获取全部顶层条目并逐个产出，处理当前页时预取下一页，内存占用只与分页大小有关"""
+    params = {**(params or {}), "limit": PAGE_SIZE}
+    start = 0
+    next_page = asyncio.ensure_future(api_get(config, "/items/top", {**params, "start": start}))
+    try:
+        while next_page is not None:
+            resp = await next_page
+            start += PAGE_SIZE
+            total = int(resp.headers.get("Total-Results", 0))
+            next_page = asyncio.ensure_future(api_get(config, "/items/top", {**params, "start": start})) if start < total else None
+            for item in parse_items(resp.content):
+                yield item
+    finally:
+        # 调用方提前结束迭代时取消尚未完成的预取，等待其结束并取回异常，避免预取失败的异常无人处理
+        # （用 asyncio.wait 等待，不会吞掉调用方自身收到的取消）
+        if next_page is not None:
+            next_page.cancel()
+            await asyncio.wait([next_page])
+            if not next_page.cancelled():
+                next_page.exception()
+
+def is_item_key(key: str) -> bool:
+    """判断是否为合法的条目键，避免逗号等字符混入 itemKey 参数而波及其他条目"""
+    return ITEM_KEY_PATTERN.fullmatch(key) is not None
+
+def library_version(resp: httpx.Response) -> int:
+    """从响应头中读取库的当前版本号"""
+    return int(resp.headers.get("Last-Modified-Version", 0))
+
+async def fetch_existing_keys(config: ZoteroConfig, item_keys: List[str]) -> Tuple[int, List[str]]:
+    """返回库版本号以及指定键中实际存在的条目键"""
+    version = 0
+    existing = []
+    for chunk in batched(item_keys, MAX_KEYS_PER_REQUEST):
+        resp = await api_get(config, "/items", {"itemKey": ",".join(chunk), "format": "keys"})
+        version = library_version(resp)
+        existing.extend(resp.text.split())
+    return version, existing
+
+async def delete_keys(config: ZoteroConfig, item_keys: Iterable[str], version: int) -> Tuple[int, List[str]]:
+    """每批最多50个键批量删除条目，返回成功数量和错误信息列表"""
+    deleted_count = 0
+    errors = []
+    # 每次删除都会使库版本号递增，因此各批次依次发送，并以上一批返回的版本号作为前置条件
+    for chunk in batched(item_keys, MAX_KEYS_PER_REQUEST):
+        headers = {**config.headers, "If-Unmodified-Since-Version": str(version)}
+        resp = await send(config, "DELETE", config.url("/items"), params={"itemKey": ",".join(chunk)}, headers=headers)
+        if resp.is_success:
+            deleted_count += len(chunk)
+            version = library_version(resp)
+        else:
+            errors.append(f"{', '.join(chunk)}: {resp.status_code} {resp.text or resp.reason_phrase}")
+    return deleted_count, errors
+
+def key_can_access(key_info: Dict[str, Any], config: ZoteroConfig) -> bool:
+    """根据 /keys/current 返回的权限信息判断密钥能否访问配置的库"""
+    access = key_info.get("access", {})
+    if config.library_type == "user":
+        return str(key_info.get("userID")) == config.library_id and "user" in access
+    groups = access.get("groups", {})
+    return "all" in groups or config.library_id in groups
 
 @app.tool()
-def configure_zotero(library_id: str, api_key: str, library_type: str = "user") -> str:
+async def configure_zotero(library_id: str, api_key: str, library_type: str = "user") -> str:
     """配置Zotero API 凭据"""
-    global ZOTERO_LIBRARY_ID, ZOTERO_API_KEY, ZOTERO_LIBRARY_TYPE, zot
-    
     # 验证输入
     if not library_id or not api_key:
         return "错误：库ID和API密钥不能为空"
@@ -40,73 +297,73 @@ def configure_zotero(library_id: str, api_key: str, library_type: str = "user")
     if library_type not in ["user", "group"]:
         return "错误：库类型必须是 'user' 或 'group'"
     
-    # 更新配置
-    ZOTERO_LIBRARY_ID = library_id.strip()
-    ZOTERO_API_KEY = api_key.strip()
-    ZOTERO_LIBRARY_TYPE = library_type.strip()
+    config = ZoteroConfig.create(library_id.strip(), api_key.strip(), library_type.strip(), http_client)
     
-    # 重置客户端
-    zot = None
-    
-    # 测试连接
-    try:
-        test_client = zotero.Zotero(ZOTERO_LIBRARY_ID, ZOTERO_LIBRARY_TYPE, ZOTERO_API_KEY)
-        # 尝试获取一个条目来验证配置
-        test_client.top(limit=1)
-        return f"✅ Zotero配置成功！\n库ID: {ZOTERO_LIBRARY_ID}\n库类型: {ZOTERO_LIBRARY_TYPE}"
-    except Exception as e:
-        return f"❌ Zotero配置失败: {str(e)}\n请检查您的库ID和API密钥是否正确"
+    async with state.config_lock:
+        # 测试连接：只查询API密钥本身的信息（响应很小），确认密钥有效且有权访问该库
+        try:
+            resp = await send(config, "GET", f"{ZOTERO_API_BASE}/keys/current", headers=config.headers)
+            resp.raise_for_status()
+            if not key_can_access(parse_json(resp.content), config):
+                raise PermissionError("API密钥无权访问该库")
+        except Exception as e:
+            return f"❌ Zotero配置失败: {str(e)}\n请检查您的库ID和API密钥是否正确"
+        
+        # 验证通过后用一次属性赋值整体替换配置，读取方不会看到新旧混杂的配置；随后清空旧库的缓存
+        state.config = config
+        response_cache.clear()
+    return f"✅ Zotero配置成功！\n库ID: {config.library_id}\n库类型: {config.library_type}"
 
 @app.tool()
-def list_items(limit: int = 50) -> str:
+async def list_items(limit: int = 50) -> str:
     """获取Zotero库中的所有条目"""
-    zot = get_zotero_client()
-    if zot is None:
+    config = get_zotero_config()
+    if config is None:
         return "❌ 错误：Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"
     
     try:
-        items = zot.top(limit=limit)
-        result = []
-        for item in items:
-            result.append({
-                "key": item.get("key"),
-                "title": item.get("data", {}).get("title", "无标题"),
-                "itemType": item.get("data", {}).get("itemType"),
-                "dateAdded": item.get("data", {}).get("dateAdded")
-            })
-        return f"找到 {len(result)} 个条目:\n" + json.dumps(result, indent=2, ensure_ascii=False)
+        result = summarize(await cached_top(config, {"limit": limit}))
+        return f"找到 {len(result)} 个条目:\n" + dumps(result)
     except Exception as e:
         return f"获取条目列表失败: {str(e)}"
 
 @app.tool()
-def delete_item(item_key: str) -> str:
+async def delete_item(item_key: str) -> str:
     """删除指定的Zotero条目"""
-    zot = get_zotero_client()
-    if zot is None:
+    config = get_zotero_config()
+    if config is None:
         return "❌ 错误：Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"
     
+    if not is_item_key(item_key):
+        return f"删除条目失败: 无效的条目键 {item_key}"
+    
     try:
-        zot.delete_item(item_key)
+        version, existing = await fetch_existing_keys(config, [item_key])
+        if not existing:
+            return f"删除条目失败: 条目 {item_key} 不存在"
+        _, errors = await delete_keys(config, existing, version)
+        if errors:
+            return f"删除条目失败: {errors[0]}"
         return f"成功删除条目: {item_key}"
     except Exception as e:
         return f"删除条目失败: {str(e)}"
 
 @app.tool()
-def delete_items_batch(item_keys: List[str]) -> str:
+async def delete_items_batch(item_keys: List[str]) -> str:
     """批量删除多个Zotero条目"""
-    zot = get_zotero_client()
-    if zot is None:
+    config = get_zotero_config()
+    if config is None:
         return "❌ 错误：Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"
     
     try:
-        success_count = 0
-        errors = []
-        for key in item_keys:
-            try:
-                zot.delete_item(key)
-                success_count += 1
-            except Exception as e:
-                errors.append(f"{key}: {str(e)}")
+        valid_keys = [key for key in item_keys if is_item_key(key)]
+        version, existing = await fetch_existing_keys(config, valid_keys)
+        success_count, errors = await delete_keys(config, existing, version)
+        existing_keys = set(existing)
+        errors.extend(
+            f"{key}: 条目不存在" if is_item_key(key) else f"{key}: 无效的条目键"
+            for key in item_keys if key not in existing_keys
+        )
         
         result = f"成功删除 {success_count} 个条目"
         if errors:
@@ -117,170 +374,145 @@ def delete_items_batch(item_keys: List[str]) -> str:
         return f"批量删除失败: {str(e)}"
 
 @app.tool()
-def search_items(query: str, item_type: Optional[str] = None) -> str:
-    """搜索Zotero条目"""
-    zot = get_zotero_client()
-    if zot is None:
+async def search_items(query: str, item_type: Optional[str] = None) -> str:
+    """搜索Zotero条目（由服务器按标题、作者和年份匹配）"""
+    config = get_zotero_config()
+    if config is None:
         return "❌ 错误：Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"
     
     try:
-        items = zot.everything(zot.top())
-        filtered_items = []
-        
-        for item in items:
-            data = item.get("data", {})
-            title = data.get("title", "").lower()
-            
-            # 基本搜索匹配
-            if query.lower() in title:
-                if item_type is None or data.get("itemType") == item_type:
-                    filtered_items.append({
-                        "key": item.get("key"),
-                        "title": data.get("title", "无标题"),
-                        "itemType": data.get("itemType"),
-                        "dateAdded": data.get("dateAdded")
-                    })
+        # 在服务器端完成过滤，只下载匹配的条目
+        params = {"q": query, "qmode": SEARCH_QMODE}
+        if item_type is not None:
+            params["itemType"] = item_type
+        filtered_items = summarize(await cached_top(config, params, all_pages=True))
         
-        return f"搜索结果 ({len(filtered_items)} 个条目):\n" + json.dumps(filtered_items, indent=2, ensure_ascii=False)
+        return f"搜索结果 ({len(filtered_items)} 个条目):\n" + dumps(filtered_items)
     except Exception as e:
         return f"搜索失败: {str(e)}"
 
 @app.tool()
-def get_item_details(item_key: str) -> str:
+async def get_item_details(item_key: str) -> str:
     """获取指定条目的详细信息"""
-    zot = get_zotero_client()
-    if zot is None:
+    config = get_zotero_config()
+    if config is None:
         return "❌ 错误：Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"
     
     try:
-        item = zot.item(item_key)
-        return f"条目详情:\n" + json.dumps(item, indent=2, ensure_ascii=False)
+        item = parse_json((await api_get(config, f"/items/{item_key}")).content)
+        return f"条目详情:\n" + dumps(item)
     except Exception as e:
         return f"获取条目详情失败: {str(e)}"
 
 @app.tool()
-def retain_items_by_criteria(
+async def retain_items_by_criteria(
     criteria: Dict[str, Any], 
     dry_run: bool = True
 ) -> str:
     """根据条件保留特定条目，删除其他条目"""
-    zot = get_zotero_client()
-    if zot is None:
+    config = get_zotero_config()
+    if config is None:
         return "❌ 错误：Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"
     
     try:
-        all_items = zot.everything(zot.top())
-        items_to_retain = []
-        items_to_delete = []
+        # 库中所有顶层条目的键及当前库版本号
+        resp = await api_get(config, "/items/top", {"format": "keys"})
+        version = library_version(resp)
+        all_keys = resp.text.split()
+        
+        # 将API支持的条件交给服务器过滤，只下载可能保留的条目，并逐页流式处理
+        search_params = {}
+        if "item_type" in criteria:
+            search_params["itemType"] = criteria["item_type"]
+        if "title_contains" in criteria:
+            search_params["q"] = criteria["title_contains"]
+            search_params["qmode"] = SEARCH_QMODE
+        # 检查各种条件（服务器搜索还会匹配作者和年份，这里再精确核对标题），任一条件不满足即短路
+        matches = compile_criteria(criteria)
+        retained_keys = {item.key async for item in iter_top(config, search_params) if matches(item)}
         
-        for item in all_items:
-            data = item.get("data", {})
-            should_retain = True
-            
-            # 检查各种条件
-            if "item_type" in criteria:
-                if data.get("itemType") != criteria["item_type"]:
-                    should_retain = False
-            
-            if "title_contains" in criteria:
-                if criteria["title_contains"].lower() not in data.get("title", "").lower():
-                    should_retain = False
-            
-            # 可以添加更多条件检查...
-            
-            if should_retain:
-                items_to_retain.append(item)
-            else:
-                items_to_delete.append(item)
+        # 不满足条件的条目全部删除；待删除的键在预览或删除时按需生成，不单独构造完整列表
+        delete_count = len(all_keys) - len(retained_keys.intersection(all_keys))
+        # filterfalse 与集合的 __contains__ 组合，逐键判断在C层完成
+        keys_to_delete = filterfalse(retained_keys.__contains__, all_keys)
         
-        result = f"根据条件筛选结果:\n"
-        result += f"保留条目: {len(items_to_retain)} 个\n"
-        result += f"待删除条目: {len(items_to_delete)} 个\n"
+        parts = [
+            "根据条件筛选结果:\n",
+            f"保留条目: {len(retained_keys)} 个\n",
+            f"待删除条目: {delete_count} 个\n",
+        ]
         
         if dry_run:
-            result += "\n[预览模式] 待删除的条目:\n"
-            for item in items_to_delete[:10]:  # 只显示前10个
-                data = item.get("data", {})
-                result += f"- {data.get('title', '无标题')} ({item.get('key')})\n"
-            if len(items_to_delete) > 10:
-                result += f"... 还有 {len(items_to_delete) - 10} 个条目\n"
+            parts.append("\n[预览模式] 待删除的条目:\n")
+            # 只显示前10个
+            preview_keys = list(islice(keys_to_delete, 10))
+            if preview_keys:
+                resp = await api_get(config, "/items", {"itemKey": ",".join(preview_keys)})
+                parts.extend(f"- {'无标题' if item.title is None else item.title} ({item.key})\n" for item in parse_items(resp.content))
+            if delete_count > 10:
+                parts.append(f"... 还有 {delete_count - 10} 个条目\n")
         else:
-            # 实际删除
-            deleted_count = 0
-            for item in items_to_delete:
-                try:
-                    zot.delete_item(item.get("key"))
-                    deleted_count += 1
-                except Exception as e:
-                    result += f"删除失败 {item.get('key')}: {str(e)}\n"
-            result += f"\n实际删除了 {deleted_count} 个条目"
+            # 实际删除：边筛选边按批次删除
+            deleted_count, errors = await delete_keys(config, keys_to_delete, version)
+            parts.extend(f"删除失败 {error}\n" for error in errors)
+            parts.append(f"\n实际删除了 {deleted_count} 个条目")
         
-        return result
+        return "".join(parts)
     except Exception as e:
         return f"执行筛选操作失败: {str(e)}"
 
 # 添加资源
 @app.resource("zotero://library/stats")
-def get_library_stats() -> str:
+async def get_library_stats() -> str:
     """获取Zotero库的统计信息"""
-    zot = get_zotero_client()
-    if zot is None:
-        return json.dumps({"error": "Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"}, ensure_ascii=False)
+    config = get_zotero_config()
+    if config is None:
+        return dumps({"error": "Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"}, indent=False)
     
     try:
-        items = zot.top()
-        total_count = len(items)
-        
-        # 统计不同类型的条目
-        type_counts = {}
-        for item in items:
-            item_type = item.get("data", {}).get("itemType", "unknown")
-            type_counts[item_type] = type_counts.get(item_type, 0) + 1
+        # 与原先 pyzotero 的默认值一致，统计最多前100个条目
+        items = await cached_top(config, {"limit": PAGE_SIZE})
         
+        # 统计不同类型的条目（Zotero条目总是带有 itemType 字段）
         stats = {
-            "total_items": total_count,
-            "item_types": type_counts
+            "total_items": len(items),
+            "item_types": dict(Counter(item.item_type for item in items))
         }
         
-        return json.dumps(stats, indent=2, ensure_ascii=False)
+        return dumps(stats)
     except Exception as e:
-        return json.dumps({"error": f"获取库统计信息失败: {str(e)}"}, ensure_ascii=False)
+        return dumps({"error": f"获取库统计信息失败: {str(e)}"}, indent=False)
 
 @app.resource("zotero://library/recent")
-def get_recent_items() -> str:
+async def get_recent_items() -> str:
     """获取最近添加的条目"""
-    zot = get_zotero_client()
-    if zot is None:
-        return json.dumps({"error": "Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"}, ensure_ascii=False)
+    config = get_zotero_config()
+    if config is None:
+        return dumps({"error": "Zotero未配置。请先使用 configure_zotero 工具设置您的API凭据。"}, indent=False)
     
     try:
-        items = zot.top(limit=10)
-        recent_items = []
-        
-        for item in items:
-            data = item.get("data", {})
-            recent_items.append({
-                "key": item.get("key"),
-                "title": data.get("title", "无标题"),
-                "itemType": data.get("itemType"),
-                "dateAdded": data.get("dateAdded")
-            })
+        recent_items = summarize(await cached_top(config, {"limit": 10}))
         
-        return json.dumps(recent_items, indent=2, ensure_ascii=False)
+        return dumps(recent_items)
     except Exception as e:
-        return json.dumps({"error": f"获取最近条目失败: {str(e)}"}, ensure_ascii=False)
+        return dumps({"error": f"获取最近条目失败: {str(e)}"}, indent=False)
 
 @app.tool()
 def check_zotero_config() -> str:
     """检查当前Zotero配置状态"""
-    if not ZOTERO_LIBRARY_ID or not ZOTERO_API_KEY:
+    config = get_zotero_config()
+    if config is None:
         return "❌ Zotero未配置\n请使用 configure_zotero 工具设置您的API凭据\n\n需要的信息:\n- library_id: 您的Zotero库ID\n- api_key: 您的Zotero API密钥\n- library_type: 'user' 或 'group'"
     
-    # 隐藏API密钥的部分内容
-    masked_key = ZOTERO_API_KEY[:8] + "*" * (len(ZOTERO_API_KEY) - 8) if len(ZOTERO_API_KEY) > 8 else "*" * len(ZOTERO_API_KEY)
-    
-    return f"✅ Zotero已配置\n库ID: {ZOTERO_LIBRARY_ID}\n库类型: {ZOTERO_LIBRARY_TYPE}\nAPI密钥: {masked_key}"
+    return f"✅ Zotero已配置\n库ID: {config.library_id}\n库类型: {config.library_type}\nAPI密钥: {config.masked_key}"
+
+async def serve() -> None:
+    """以标准输入输出运行服务器，退出时在同一事件循环中释放HTTP连接池"""
+    try:
+        await app.run_stdio_async()  # 使用标准输入输出作为传输方式
+    finally:
+        await http_client.aclose()
 
 # 启动MCP服务器
 if __name__ == "__main__":
-    app.run(transport='stdio')  # 使用标准输入输出作为传输方式
\ No newline at end of file
+    asyncio.run(serve())
\ No newline at end of file